@@ -5,8 +5,11 @@ Run this ONCE at project initialization:
 """
 
 import sqlite3
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import logging
@@ -18,6 +21,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# WAL + tuned PRAGMAs applied to every connection
+TUNED_PRAGMAS = '''
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA cache_size=-65536;
+    PRAGMA busy_timeout=5000;
+'''
+
+
+def open_connection(db_path):
+    """Open a SQLite connection with WAL and tuned PRAGMAs"""
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(TUNED_PRAGMAS)
+    return conn
+
 
 def get_paths():
     """Get project paths"""
@@ -44,13 +64,59 @@ def get_paths_to_save(file_requested):
 
     return path_dic[file_requested]
 
+def bulk_insert(conn, table, columns, tbl, chunk_size=10000):
+    """
+    Insert Arrow Table rows into an existing table with executemany
+    inside a single explicit transaction.
+
+    Avoids pandas to_sql, which replaces the typed schema (dropping
+    foreign keys) and pays per-row statement overhead.
+    """
+    placeholders = ', '.join('?' * len(columns))
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    rows = list(zip(*(tbl.column(c).to_pylist() for c in columns)))
+
+    cursor = conn.cursor()
+    cursor.execute('BEGIN')
+    for start in range(0, len(rows), chunk_size):
+        cursor.executemany(sql, rows[start:start + chunk_size])
+    conn.commit()
+
+
+def encode_area_codes(codes):
+    """
+    Integer JOIN keys for area code strings (e.g. '1000005' -> 1000005).
+
+    The codes are numeric, so the encoding is deterministic - every
+    loader can compute it independently, no shared lookup table needed.
+    Fixed-width int64 compares keep B-tree pages ~3x denser than the
+    variable-length TEXT keys they replace.
+    """
+    return pc.cast(codes, pa.int64())
+
+
+def encode_soc_codes(codes):
+    """Integer JOIN keys for SOC code strings ('15-1252' -> 151252)"""
+    return pc.cast(pc.replace_substring(codes, '-', ''), pa.int64())
+
+
+def export_csv(tbl, path):
+    """Write an Arrow Table through Arrow's vectorized C++ CSV writer"""
+    pacsv.write_csv(tbl, str(path))
+
+
 def verify_csv_files(paths):
     """Verify all CSV files exist"""
     logger.info("Verifying CSV files...")
-    
+
+    # Single scandir pass instead of a stat call per file
+    data_dir = paths['db_path'].parent
+    entries = {e.name for e in os.scandir(data_dir)} if data_dir.exists() else set()
+
     for csv_name, csv_path in paths.items():
         if csv_name.endswith('_csv'):
-            if not csv_path.exists():
+            if csv_path.name not in entries:
                 raise FileNotFoundError(f"Missing: {csv_path}")
             logger.info(f"  ✓ Found {csv_path.name}")
 
@@ -67,34 +133,40 @@ def create_database(db_path):
     # Ensure parent directory exists
     db_path.parent.mkdir(parents=True, exist_ok=True)
     
-    # Connect to new database
-    conn = sqlite3.connect(str(db_path))
+    # WAL from the start: the loaders run concurrently on their own
+    # connections, which journal_mode=OFF / EXCLUSIVE locking would block
+    conn = open_connection(db_path)
     cursor = conn.cursor()
-    
+
     # ========== CREATE TABLES ==========
     logger.info("Creating tables...")
     
-    # 1. Geography table
+    # 1. Geography table - one row per (state, county). Area codes
+    # repeat across counties (530 distinct codes over 3,275 rows:
+    # nonmetropolitan areas span several counties), so the natural
+    # key is the county, not the area.
     cursor.execute('''
         CREATE TABLE geography (
-            area_code TEXT PRIMARY KEY,
+            area_code TEXT NOT NULL,
+            area_id INTEGER NOT NULL,
             state TEXT NOT NULL,
             county TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             UNIQUE(state, county)
         )
     ''')
     cursor.execute('CREATE INDEX idx_geography_state ON geography(state)')
-    cursor.execute('CREATE INDEX idx_geography_state_county ON geography(state, county)')
+    # area_id repeats per county within an area; this non-unique index
+    # drives the 1:N join from wage_levels
+    cursor.execute('CREATE INDEX idx_geography_area_id ON geography(area_id)')
     logger.info("  ✓ Created geography table with indexes")
     
     # 2. Occupations table
     cursor.execute('''
         CREATE TABLE occupations (
             soc_code TEXT PRIMARY KEY,
+            soc_id INTEGER NOT NULL UNIQUE,
             job_title TEXT NOT NULL,
-            description TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            description TEXT
         )
     ''')
     cursor.execute('CREATE INDEX idx_occupations_title ON occupations(job_title)')
@@ -104,23 +176,17 @@ def create_database(db_path):
     # 3. Wage levels table (depends on geography + occupations)
     cursor.execute('''
         CREATE TABLE wage_levels (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            area_code TEXT NOT NULL,
-            soc_code TEXT NOT NULL,
+            area_id INTEGER NOT NULL,
+            soc_id INTEGER NOT NULL,
             l1_wage REAL NOT NULL,
             l2_wage REAL NOT NULL,
             l3_wage REAL NOT NULL,
             l4_wage REAL NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(area_code, soc_code),
-            FOREIGN KEY (area_code) REFERENCES geography(area_code),
-            FOREIGN KEY (soc_code) REFERENCES occupations(soc_code)
+            UNIQUE(area_id, soc_id),
+            FOREIGN KEY (soc_id) REFERENCES occupations(soc_id)
         )
     ''')
-    cursor.execute('CREATE INDEX idx_wage_levels_area_soc ON wage_levels(area_code, soc_code)')
-    cursor.execute('CREATE INDEX idx_wage_levels_soc ON wage_levels(soc_code)')
-    cursor.execute('CREATE INDEX idx_wage_levels_area ON wage_levels(area_code)')
-    logger.info("  ✓ Created wage_levels table with indexes")
+    logger.info("  ✓ Created wage_levels table (indexes created after bulk load)")
     
     # 4. Metadata table
     cursor.execute('''
@@ -133,107 +199,210 @@ def create_database(db_path):
     logger.info("  ✓ Created metadata table")
     
     conn.commit()
-    return conn
+    conn.close()
 
 
 def load_geography_data(conn, csv_path):
     """Load Geography.csv into database"""
     logger.info("\nLoading Geography.csv...")
     
-    geo_df = pd.read_csv(str(csv_path))
-    logger.info(f"  ✓ Read {len(geo_df)} rows from CSV")
-    
-    # Drop some columns and rename to lowercase
-    geo_df['state'] = geo_df['State'].str.cat(geo_df['StateAb'], sep=' (') + ')'
-    geo_df.drop(columns=["StateAb","State"], inplace=True)
-    geo_df.rename(columns={
-        "Area": 'area_code',
-        "AreaName": 'area_name',
-        "CountyTownName": 'county'
-    }, inplace=True)    
-
-    # Load into database
-    geo_df.to_sql('geography', conn, if_exists='replace', index=False)
-    logger.info(f"  ✓ Inserted {len(geo_df)} geography records")
-
-    geo_df.to_csv(get_paths_to_save('geo_csv'), index=False, encoding="utf-8")
-    
-    return len(geo_df)
+    # Explicit schema + column list: the C parser skips anything not
+    # listed and string types keep area codes textual, matching the
+    # ALC side
+    tbl = pacsv.read_csv(
+        str(csv_path),
+        convert_options=pacsv.ConvertOptions(
+            column_types={
+                'Area': pa.string(),
+                'AreaName': pa.string(),
+                'CountyTownName': pa.string(),
+                'State': pa.string(),
+                'StateAb': pa.string(),
+            },
+            include_columns=['Area', 'AreaName', 'CountyTownName', 'State', 'StateAb'],
+            strings_can_be_null=True,  # '' -> null, matching pandas
+        ),
+    )
+    logger.info(f"  ✓ Read {tbl.num_rows} rows from CSV")
+
+    # Build "State (AB)" with Arrow's element-wise join kernel
+    state = pc.binary_join_element_wise(tbl.column('State'), tbl.column('StateAb'), ' (')
+    state = pc.binary_join_element_wise(state, pa.array([')'] * tbl.num_rows), '')
+
+    # Drop the raw State/StateAb columns and rename to lowercase
+    geo_tbl = pa.table({
+        'area_code': tbl.column('Area'),
+        'area_id': encode_area_codes(tbl.column('Area')),  # integer JOIN key
+        'area_name': tbl.column('AreaName'),
+        'county': tbl.column('CountyTownName'),
+        'state': state,
+    })
+
+    # Load into database (keep the typed schema from create_database)
+    bulk_insert(conn, 'geography', ('area_code', 'area_id', 'state', 'county'), geo_tbl)
+    logger.info(f"  ✓ Inserted {geo_tbl.num_rows} geography records")
+
+    export_csv(geo_tbl, get_paths_to_save('geo_csv'))
+
+    # Distinct-county count comes from the in-memory table so
+    # load_metadata never needs a COUNT(DISTINCT) table scan
+    return geo_tbl.num_rows, pc.count_distinct(geo_tbl.column('county')).as_py()
 
 
 def load_occupations_data(conn, csv_path):
     """Load oes_soc_occs.csv into database"""
     logger.info("\nLoading oes_soc_occs.csv...")
     
-    soc_df = pd.read_csv(str(csv_path))
-    logger.info(f"  ✓ Read {len(soc_df)} rows from CSV")
-    
+    tbl = pacsv.read_csv(
+        str(csv_path),
+        convert_options=pacsv.ConvertOptions(
+            column_types={
+                'soccode': pa.string(),
+                'Title': pa.string(),
+                'Description': pa.string(),
+            },
+            include_columns=['soccode', 'Title', 'Description'],
+            strings_can_be_null=True,  # '' -> null, matching pandas
+        ),
+    )
+    logger.info(f"  ✓ Read {tbl.num_rows} rows from CSV")
+
     # Rename columns to lowercase
-    soc_df.rename(columns={
-        "soccode": 'soc_code',
-        "Title": 'job_title',
-        "Description": 'description'
-    }, inplace=True)
-    
-    # Load into database
-    soc_df.to_sql('occupations', conn, if_exists='replace', index=False)
-    logger.info(f"  ✓ Inserted {len(soc_df)} occupation records")
+    soc_tbl = pa.table({
+        'soc_code': tbl.column('soccode'),
+        'soc_id': encode_soc_codes(tbl.column('soccode')),  # integer JOIN key
+        'job_title': tbl.column('Title'),
+        'description': tbl.column('Description'),
+    })
 
-    soc_df.to_csv(get_paths_to_save('soc_csv'), index=False, encoding="utf-8")
-    
-    return len(soc_df)
+    # Load into database (keep the typed schema from create_database)
+    bulk_insert(conn, 'occupations', ('soc_code', 'soc_id', 'job_title', 'description'), soc_tbl)
+    logger.info(f"  ✓ Inserted {soc_tbl.num_rows} occupation records")
+
+    export_csv(soc_tbl, get_paths_to_save('soc_csv'))
+
+    return soc_tbl.num_rows
 
 
 def load_wage_levels_data(conn, csv_path):
     """Load ALC_Export.csv into database"""
     logger.info("\nLoading ALC_Export.csv...")
     
-    alc_df = pd.read_csv(str(csv_path))
-    logger.info(f"  ✓ Read {len(alc_df)} rows from CSV")
-    
-    # Filter unwanted wage labels and convert hourly wage levels to annual salaries
-    alc_df.query("Label != 'High Wage' and Label != 'No Leveled Wage'", inplace=True)
+    # Arrow's multithreaded reader with an explicit column schema:
+    # no type inference pass and no per-column to_numeric cleanup after
+    convert_options = pacsv.ConvertOptions(
+        column_types={
+            'Area': pa.string(),
+            'SocCode': pa.string(),
+            'Label': pa.string(),
+            'Level1': pa.float64(),
+            'Level2': pa.float64(),
+            'Level3': pa.float64(),
+            'Level4': pa.float64(),
+        },
+        include_columns=[
+            'Area', 'SocCode', 'GeoLvl',
+            'Level1', 'Level2', 'Level3', 'Level4',
+            'Average', 'Label',
+        ],
+        # '' -> null like pandas read_csv; without this the empty
+        # Label cells that mark hourly rows never match is_null below
+        # and 93% of wages stay hourly
+        strings_can_be_null=True,
+    )
+    tbl = pacsv.read_csv(str(csv_path), convert_options=convert_options)
+    logger.info(f"  ✓ Read {tbl.num_rows} rows from CSV")
 
-    cols = ['Level1', 'Level2', 'Level3', 'Level4']
-    mask = alc_df['Label'].isna()
-    alc_df.loc[mask, cols] = alc_df.loc[mask, cols] * 40 * 52
+    # Filter unwanted wage labels (unlabelled rows are kept)
+    labelled = pc.is_in(
+        tbl.column('Label'),
+        value_set=pa.array(['High Wage', 'No Leveled Wage']),
+    )
+    tbl = tbl.filter(pc.fill_null(pc.invert(labelled), True))
 
-    alc_df.drop(columns="Label", inplace=True)
-    
-    # Rename columns to lowercase
-    alc_df.rename(columns={
-        "Area": 'area_code',
-        "SocCode": 'soc_code',
-        "GeoLvl": 'geo_level_wage',
-        "Level1": 'l1_wage',
-        "Level2": 'l2_wage',
-        "Level3": 'l3_wage',
-        "Level4": 'l4_wage',
-        "Average": 'average'
-    }, inplace=True)
-    
-    # Convert wage columns to float
-    for col in ['l1_wage', 'l2_wage', 'l3_wage', 'l4_wage']:
-        alc_df[col] = pd.to_numeric(alc_df[col], errors='coerce')
-    
-    # Load into database
-    alc_df.to_sql('wage_levels', conn, if_exists='replace', index=False)
-    logger.info(f"  ✓ Inserted {len(alc_df)} wage level records")
+    # Convert hourly wage levels to annual salaries branchlessly:
+    # if_else on the null-Label mask instead of a Python-side fancy
+    # indexing round-trip. 2080 = 40h/week * 52 weeks.
+    hourly = pc.is_null(tbl.column('Label'))
+    levels = {
+        col: pc.if_else(hourly, pc.multiply(tbl.column(col), 2080.0), tbl.column(col))
+        for col in ('Level1', 'Level2', 'Level3', 'Level4')
+    }
 
-    alc_df.to_csv(get_paths_to_save('alc_csv'), index=False, encoding="utf-8")
-    
-    return len(alc_df)
+    # Drop Label and rename columns to lowercase
+    alc_tbl = pa.table({
+        'area_code': tbl.column('Area'),
+        'soc_code': tbl.column('SocCode'),
+        # Integer JOIN keys; the fact table stores only these
+        'area_id': encode_area_codes(tbl.column('Area')),
+        'soc_id': encode_soc_codes(tbl.column('SocCode')),
+        'geo_level_wage': tbl.column('GeoLvl'),
+        'l1_wage': levels['Level1'],
+        'l2_wage': levels['Level2'],
+        'l3_wage': levels['Level3'],
+        'l4_wage': levels['Level4'],
+        'average': tbl.column('Average'),
+    })
+
+    # Load into database (keep the typed schema from create_database)
+    bulk_insert(
+        conn, 'wage_levels',
+        ('area_id', 'soc_id', 'l1_wage', 'l2_wage', 'l3_wage', 'l4_wage'),
+        alc_tbl
+    )
+    logger.info(f"  ✓ Inserted {alc_tbl.num_rows} wage level records")
+
+    export_csv(alc_tbl, get_paths_to_save('alc_csv'))
+
+    return alc_tbl.num_rows
+
+
+def run_loader(loader, db_path, csv_path):
+    """
+    Run one load_*_data function on its own bulk-tuned WAL connection.
+
+    Each loader touches a disjoint table; the long busy_timeout lets
+    their commit transactions queue on the WAL write lock while CSV
+    parsing and Arrow compute overlap across threads.
+    """
+    conn = open_connection(db_path)
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute('PRAGMA busy_timeout=30000')
+    try:
+        return loader(conn, csv_path)
+    finally:
+        conn.close()
+
+
+def create_wage_level_indexes(conn):
+    """
+    Create wage_levels indexes after the bulk load so inserts skip
+    per-row B-tree maintenance.
+
+    UNIQUE(area_id, soc_id) already auto-creates an index that covers
+    (area_id, soc_id) lookups and any area_id prefix, so only soc_id
+    needs its own index.
+    """
+    logger.info("\nCreating wage_levels indexes...")
+
+    cursor = conn.cursor()
+    cursor.execute('CREATE INDEX idx_wage_levels_soc ON wage_levels(soc_id)')
+    cursor.execute('ANALYZE')
+    conn.commit()
+    logger.info("  ✓ Created idx_wage_levels_soc and ran ANALYZE")
 
 
-def load_metadata(conn, geo_count, soc_count, alc_count):
+def load_metadata(conn, geo_count, soc_count, alc_count, distinct_counties):
     """Load metadata into database"""
     logger.info("\nInserting metadata...")
-    
+
     cursor = conn.cursor()
+    # Load provenance lives here as single rows instead of a
+    # created_at column repeated on every data row
     metadata = [
         ('last_import', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
         ('data_version', '2025-Q1'),
-        ('total_counties', str(cursor.execute('SELECT COUNT(DISTINCT county) FROM geography').fetchone()[0])),
+        ('total_counties', str(distinct_counties)),
         ('total_occupations', str(soc_count)),
         ('total_wage_records', str(alc_count)),
     ]
@@ -249,9 +418,9 @@ def verify_database(db_path):
     logger.info("DATABASE VERIFICATION")
     logger.info("="*60)
     
-    conn = sqlite3.connect(str(db_path))
+    conn = open_connection(db_path)
     cursor = conn.cursor()
-    
+
     # Check table existence
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
     tables = [row[0] for row in cursor.fetchall()]
@@ -285,7 +454,7 @@ def verify_database(db_path):
     for soc, title in cursor.fetchall():
         logger.info(f"    {soc}: {title}")
     
-    cursor.execute('SELECT state, county, l1_wage FROM geography g JOIN wage_levels w ON g.area_code = w.area_code LIMIT 3')
+    cursor.execute('SELECT g.state, g.county, w.l1_wage FROM geography g JOIN wage_levels w ON g.area_id = w.area_id LIMIT 3')
     for state, county, wage in cursor.fetchall():
         logger.info(f"    {state}/{county}: L1 = ${wage:,.2f}")
     
@@ -313,18 +482,35 @@ def main():
         
         # Verify CSV files
         verify_csv_files(paths)
-        
-        # Create database and schema
-        conn = create_database(paths['db_path'])
-        
-        # Load data
-        geo_count = load_geography_data(conn, paths['geo_csv'])
-        soc_count = load_occupations_data(conn, paths['soc_csv'])
-        alc_count = load_wage_levels_data(conn, paths['alc_csv'])
-        
+
+        # Pre-create the export directory so the CSV exports never fail on it
+        get_paths_to_save('geo_csv').parent.mkdir(parents=True, exist_ok=True)
+
+        # Create database and schema (must finish before the loads start)
+        create_database(paths['db_path'])
+
+        # Load the three disjoint tables concurrently, one WAL
+        # connection per thread
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            geo_future = executor.submit(
+                run_loader, load_geography_data, paths['db_path'], paths['geo_csv'])
+            soc_future = executor.submit(
+                run_loader, load_occupations_data, paths['db_path'], paths['soc_csv'])
+            alc_future = executor.submit(
+                run_loader, load_wage_levels_data, paths['db_path'], paths['alc_csv'])
+
+            geo_count, distinct_counties = geo_future.result()
+            soc_count = soc_future.result()
+            alc_count = alc_future.result()
+
+        conn = open_connection(paths['db_path'])
+
+        # Index after load, then refresh planner stats
+        create_wage_level_indexes(conn)
+
         # Load metadata
-        load_metadata(conn, geo_count, soc_count, alc_count)
-        
+        load_metadata(conn, geo_count, soc_count, alc_count, distinct_counties)
+
         conn.close()
         
         # Verify
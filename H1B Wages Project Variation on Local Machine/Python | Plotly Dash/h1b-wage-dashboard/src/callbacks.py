@@ -4,15 +4,17 @@ Dash Callbacks for H1B Wage Dashboard
 Phase 2: Connect UI components to Phase 1 query layer
 """
 
-from collections import defaultdict
+from functools import lru_cache
 
 from dash import Input, Output, callback, html
+import numpy as np
 import plotly.graph_objs as go
 
-from queries import queries
+from queries import queries, BAND_NAMES
 
 
-BUCKETS = ["Below L1", "Level I", "Level II", "Level III", "Level IV"]
+# Shared band labels: index = number of wage levels the salary meets
+BUCKETS = list(BAND_NAMES)
 COLOR_MAP = {
     "Below L1": "#bbbbbb",
     "Level I": "#1f77b4",
@@ -21,6 +23,91 @@ COLOR_MAP = {
     "Level IV": "#d62728",
 }
 
+# Map trace templates and resolved layout, validated once at import.
+# Callbacks copy these plain dicts instead of rebuilding (and
+# re-validating) plotly objects on every salary change.
+BASE_MAP_TRACES = {
+    bucket: go.Scattergeo(
+        locationmode="USA-states",
+        mode="markers",
+        marker=dict(
+            size=0.5,
+            color=COLOR_MAP[bucket],
+            opacity=1.0,
+        ),
+        name=bucket,
+    ).to_plotly_json()
+    for bucket in BUCKETS
+}
+
+MAP_LAYOUT = go.Layout(
+    geo=dict(
+        scope="usa",
+        showland=True,
+        landcolor="rgb(240, 240, 240)",
+        showcountries=True,
+    ),
+    margin=dict(l=5, r=5, t=20, b=10),
+    template="plotly_white",
+).to_plotly_json()
+
+
+@lru_cache(maxsize=256)
+def _base_wage_card(state, county, soc_code):
+    """
+    Build the salary-independent pieces of the wage card once per
+    (state, county, soc_code): the summary line, pre-formatted table
+    rows as (level, hourly_text, annual_text, annual), and the base
+    bar chart as a plain plotly JSON dict.
+
+    Returns (summary, table_rows, figure_dict); table_rows and
+    figure_dict are None when no wage record exists.
+    """
+    # One SQL round-trip for occupation details + wage levels
+    bundle = queries.get_dashboard_bundle(state, county, soc_code)
+    occ = bundle["occupation"]
+    wages = bundle["wages"]
+
+    if not occ:
+        summary = f"{state} / {county} | SOC {soc_code}"
+    else:
+        summary = f"{state} / {county} | {occ['job_title']} ({occ['soc_code']})"
+
+    if not wages:
+        return summary, None, None
+
+    levels = ["L1", "L2", "L3", "L4"]
+    values = [wages[l] for l in levels]
+
+    fig = go.Figure(
+        data=[
+            go.Bar(
+                x=levels,
+                y=values,
+                marker_color=["#17a2b8", "#28a745", "#ffc107", "#dc3545"],
+                name="Prevailing wage",
+            )
+        ]
+    )
+    fig.update_layout(
+        margin=dict(l=10, r=10, t=30, b=30),
+        yaxis_title="Annual Wage (USD)",
+        xaxis_title="Wage Level",
+        template="plotly_white",
+    )
+
+    table_rows = tuple(
+        (
+            level,
+            f"${wages[level] / 2080.0:,.2f}",  # 40h/week * 52 weeks
+            f"${wages[level]:,.0f}",
+            wages[level],
+        )
+        for level in levels
+    )
+
+    return summary, table_rows, fig.to_plotly_json()
+
 
 @callback(
     Output("county-dropdown", "options"),
@@ -53,20 +140,17 @@ def update_wage_card_and_chart(state, county, soc_code, salary):
     Update wage bar chart and wage details table when user selects
     state, county, and occupation. Optionally uses salary to compute
     PW Ratio and Status.
+
+    The salary-independent pieces (summary, base figure, formatted
+    wage strings) come from a cached helper, so keystrokes in the
+    salary input only overlay the salary line and recompute the
+    PW Ratio / Status columns.
     """
     if not state or not county or not soc_code:
         return {}, "Select state, county, and occupation to view wage levels.", ""
 
-    # Get occupation details
-    occ = queries.get_occupation_by_code(soc_code)
-    if not occ:
-        summary = f"{state} / {county} | SOC {soc_code}"
-    else:
-        summary = f"{state} / {county} | {occ['job_title']} ({occ['soc_code']})"
-
-    # Get wages
-    wages = queries.get_wage_levels(state, county, soc_code)
-    if not wages:
+    summary, table_rows, base_fig = _base_wage_card(state, county, soc_code)
+    if base_fig is None:
         return (
             {},
             summary,
@@ -75,20 +159,9 @@ def update_wage_card_and_chart(state, county, soc_code, salary):
             ),
         )
 
-    levels = ["L1", "L2", "L3", "L4"]
-    values = [wages[l] for l in levels]
-
-    # Bar chart with optional horizontal salary line
-    fig = go.Figure(
-        data=[
-            go.Bar(
-                x=levels,
-                y=values,
-                marker_color=["#17a2b8", "#28a745", "#ffc107", "#dc3545"],
-                name="Prevailing wage",
-            )
-        ]
-    )
+    # Shallow-copy the cached figure dict and overlay the salary line
+    fig = dict(base_fig)
+    layout = dict(fig["layout"])
 
     shapes = []
     annotations = []
@@ -118,21 +191,13 @@ def update_wage_card_and_chart(state, county, soc_code, salary):
             )
         )
 
-    fig.update_layout(
-        margin=dict(l=10, r=10, t=30, b=30),
-        yaxis_title="Annual Wage (USD)",
-        xaxis_title="Wage Level",
-        template="plotly_white",
-        shapes=shapes,
-        annotations=annotations,
-    )
+    layout["shapes"] = shapes
+    layout["annotations"] = annotations
+    fig["layout"] = layout
 
-    # Wage details table
+    # Wage details table (only PW Ratio / Status depend on salary)
     rows = []
-    for level in levels:
-        annual = wages[level]
-        hourly = annual / 2080.0  # 40h/week * 52 weeks
-
+    for level, hourly_text, annual_text, annual in table_rows:
         if salary and salary > 0:
             ratio = salary / annual * 100
             if ratio >= 100:
@@ -150,8 +215,8 @@ def update_wage_card_and_chart(state, county, soc_code, salary):
             html.Tr(
                 [
                     html.Td(level),
-                    html.Td(f"${hourly:,.2f}"),
-                    html.Td(f"${annual:,.0f}"),
+                    html.Td(hourly_text),
+                    html.Td(annual_text),
                     html.Td(ratio_text),
                     html.Td(status),
                 ]
@@ -192,67 +257,39 @@ def update_wage_map(soc_code, salary):
     if not soc_code or not salary or salary <= 0:
         return {}
 
-    # This already returns L1–L4 per (state, county)
-    all_wages = queries.get_all_wages_for_occupation(soc_code)
-    if not all_wages:
+    # Cached parallel arrays: 'state', 'county', 'wages' (N, 4)
+    arrays = queries.get_all_wages_for_occupation(soc_code)
+    if arrays is None:
         return {}
-    
-    bucket_points = defaultdict(lambda: {"states": [], "counties": []})
-
-    for (state, county), w in all_wages.items():
-        w1, w2, w3, w4 = w["L1"], w["L2"], w["L3"], w["L4"]
-
-        if salary < w1:
-            bucket = "Below L1"
-        elif salary < w2:
-            bucket = "Level I"
-        elif salary < w3:
-            bucket = "Level II"
-        elif salary < w4:
-            bucket = "Level III"
-        else:
-            bucket = "Level IV"
 
-        bucket_points[bucket]["states"].append(state)
-        bucket_points[bucket]["counties"].append(county)
+    states = arrays['state']
+    counties = arrays['county']
+    wages = arrays['wages']
 
+    # Bucket index 0..4 = number of wage levels the salary meets,
+    # mapping directly onto BUCKETS ("Below L1" .. "Level IV")
+    bucket_idx = (wages <= salary).sum(axis=1)
 
     # Build one trace per bucket so legend shows the five buckets
     data = []
-    for bucket in BUCKETS:
-        pts = bucket_points.get(bucket)
-        if not pts or not pts["states"]:
+    for idx, bucket in enumerate(BUCKETS):
+        mask = bucket_idx == idx
+        if not mask.any():
             continue
 
-        hover_texts = [
-            f"{c}, {s}<br>{bucket}"
-            for s, c in zip(pts["states"], pts["counties"])
-        ]
+        bucket_states = states[mask]
+        bucket_counties = counties[mask]
 
-        data.append(
-            go.Scattergeo(
-                locationmode="USA-states",
-                text=hover_texts,
-                mode="markers",
-                marker=dict(
-                    size=0.5,
-                    color=COLOR_MAP[bucket],
-                    opacity=1.0,
-                ),
-                name=bucket,
-            )
+        # "{county}, {state}<br>{bucket}" built in one C-level pass;
+        # plotly accepts the ndarray directly
+        hover_texts = np.char.add(
+            np.char.add(np.char.add(bucket_counties, ", "), bucket_states),
+            f"<br>{bucket}",
         )
 
-    fig = go.Figure(data=data)
-    fig.update_layout(
-        geo=dict(
-            scope="usa",
-            showland=True,
-            landcolor="rgb(240, 240, 240)",
-            showcountries=True,
-        ),
-        margin=dict(l=5, r=5, t=20, b=10),
-        template="plotly_white",
-    )
+        trace = dict(BASE_MAP_TRACES[bucket])
+        trace["text"] = hover_texts
+        data.append(trace)
 
-    return fig
+    # Raw figure dict: no go.Figure construction or trace validation
+    return {"data": data, "layout": MAP_LAYOUT}
@@ -3,7 +3,11 @@ Database Manager for H1B Wage Dashboard
 Handles SQLite connections with proper cleanup and error handling
 """
 
+import atexit
+import queue
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
 import os
 from pathlib import Path
@@ -11,6 +15,24 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Read-only connections kept warm in the pool
+READ_POOL_SIZE = 4
+
+# How long get_database_info may serve cached counts (seconds); the
+# data only changes when setup_database.py is re-run
+INFO_CACHE_TTL = 60.0
+
+# Tuned per-connection PRAGMAs; journal_mode=WAL is sticky on the DB
+# file and is set once at startup instead
+TUNED_PRAGMAS = '''
+    PRAGMA foreign_keys=ON;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA cache_size=-64000;
+    PRAGMA busy_timeout=30000;
+'''
+
 
 class DatabaseManager:
     """
@@ -44,123 +66,287 @@ class DatabaseManager:
             db_path = project_root / 'data' / 'h1b_wages.db'
         
         self.db_path = str(db_path)
-        
+
         # Verify database exists
         if not os.path.exists(self.db_path):
             raise FileNotFoundError(
                 f"Database not found at {self.db_path}. "
                 "Run 'python scripts/setup_database.py' first."
             )
-        
+
         logger.info(f"Initializing database at {self.db_path}")
-        
-        # Test connection
+
+        # One writer connection serialized by a lock, plus a pool of
+        # read-only connections that keep their page caches across calls
+        self._writer_lock = threading.Lock()
+        self._writer = None
+        self._read_pool = queue.LifoQueue(maxsize=READ_POOL_SIZE)
+        self._info_cache = None  # (monotonic timestamp, info dict)
+
+        # Test connection and make WAL persistent on the DB file
+        # (journal_mode survives across connections, so once is enough)
         try:
-            with self.get_connection() as conn:
-                conn.execute("SELECT 1")
+            self._writer = self._connect()
+            self._writer.execute('PRAGMA journal_mode=WAL')
+            self._writer.execute("SELECT 1")
             logger.info("✓ Database connection test successful")
         except Exception as e:
             logger.error(f"✗ Database connection failed: {e}")
             raise
-        
-        # Enable foreign keys
-        self._enable_foreign_keys()
-        
+
+        # LIFO: the most recently returned (cache-warm) reader goes out first
+        for _ in range(READ_POOL_SIZE):
+            self._read_pool.put(self._connect(readonly=True))
+
+        # Fail fast on databases built by the legacy pandas loader
+        self._verify_schema()
+
+        # Covering indexes for the hot dashboard queries
+        self._create_indexes()
+
+        # Refresh planner stats cheaply so the composite indexes are
+        # picked from the first query (analysis_limit bounds the scan)
+        self._writer.execute('PRAGMA analysis_limit=400')
+        self._writer.execute('PRAGMA optimize')
+
+        # PRAGMA optimize + close on interpreter exit
+        atexit.register(self.close)
+
         self._initialized = True
-    
+
+    def _connect(self, readonly=False):
+        """
+        Create a pooled connection; readers open with a mode=ro URI
+
+        cached_statements is raised from the default 128 so the
+        long-lived connections keep every dashboard query prepared -
+        no re-parse/re-plan once each statement has run once.
+        """
+        if readonly:
+            conn = sqlite3.connect(
+                f'file:{self.db_path}?mode=ro', uri=True,
+                check_same_thread=False,
+                cached_statements=512,
+            )
+        else:
+            conn = sqlite3.connect(
+                self.db_path, check_same_thread=False,
+                cached_statements=512,
+            )
+        conn.executescript(TUNED_PRAGMAS)
+        conn.row_factory = sqlite3.Row  # Return rows as dicts (set once)
+        return conn
+
     @contextmanager
-    def get_connection(self):
+    def get_connection(self, readonly=False, raw=False):
         """
         Context manager for database connections
-        Automatically handles commit/rollback and cleanup
-        
+        Automatically handles commit/rollback
+
+        Readers check a connection out of the pool and return it in
+        finally (never closed), so callbacks keep SQLite's page cache
+        warm and skip the ~ms connect cost per query. Writers share
+        one lock-guarded connection.
+
         Usage:
-            with db.get_connection() as conn:
+            with db.get_connection(readonly=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM geography")
                 rows = cursor.fetchall()
-        
+
+        Args:
+            readonly (bool): Check out a pooled read-only connection
+            raw (bool): Readers only - return plain tuples instead of
+                        sqlite3.Row, skipping one wrapper object per
+                        row on queries that index by position anyway
+
         Yields:
             sqlite3.Connection: Database connection
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Return rows as dicts
-        
-        try:
-            yield conn
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            logger.error(f"Database error: {e}")
-            raise
-        finally:
-            conn.close()
-    
-    def _enable_foreign_keys(self):
-        """Enable foreign key constraints"""
+        if readonly:
+            conn = self._read_pool.get(timeout=30)
+            if raw:
+                conn.row_factory = None
+            try:
+                # No commit on success: SELECTs never open a write
+                # transaction, so committing is pure lock/bookkeeping
+                # overhead on the read path
+                yield conn
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Database error: {e}")
+                raise
+            finally:
+                if raw:
+                    conn.row_factory = sqlite3.Row
+                self._read_pool.put(conn)
+        else:
+            with self._writer_lock:
+                try:
+                    yield self._writer
+                    self._writer.commit()
+                except Exception as e:
+                    self._writer.rollback()
+                    logger.error(f"Database error: {e}")
+                    raise
+
+    def close(self):
+        """
+        Close the pooled connections, letting SQLite refresh planner
+        stats from the writer's query history first
+        """
+        while True:
+            try:
+                conn = self._read_pool.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+        if self._writer is not None:
+            try:
+                self._writer.execute('PRAGMA optimize')
+                self._writer.close()
+            except sqlite3.Error:
+                pass
+            self._writer = None
+
+    def _verify_schema(self):
+        """
+        Check the database was built by the current setup script
+
+        Databases from the legacy pandas loader (including the
+        shipped archive) lack the integer key columns; raise one
+        clear error here instead of an OperationalError from
+        whichever query touches them first.
+        """
+        cols = {row[1] for row in self._writer.execute('PRAGMA table_info(wage_levels)')}
+        if not {'area_id', 'soc_id'} <= cols:
+            raise RuntimeError(
+                f"Database at {self.db_path} uses an outdated schema "
+                "(wage_levels has no area_id/soc_id columns). "
+                "Re-run 'python scripts/setup_database.py' to rebuild it."
+            )
+
+    def _create_indexes(self):
+        """
+        Create covering indexes for the hot dashboard queries
+        (idempotent), then refresh planner stats.
+
+        With the wage columns included, get_all_wages_for_occupation
+        and get_wage_levels are answered index-only - no rowid lookup
+        per matched row.
+        """
         with self.get_connection() as conn:
-            conn.execute('PRAGMA foreign_keys = ON')
-        logger.debug("Foreign keys enabled")
-    
-    def execute_query(self, query, params=()):
+            conn.executescript('''
+                CREATE INDEX IF NOT EXISTS idx_wl_soc_area
+                    ON wage_levels(soc_id, area_id,
+                                   l1_wage, l2_wage, l3_wage, l4_wage);
+                CREATE INDEX IF NOT EXISTS idx_geo_area
+                    ON geography(area_id, state, county);
+                CREATE INDEX IF NOT EXISTS idx_geo_state_county
+                    ON geography(state, county, area_id);
+                ANALYZE;
+            ''')
+        logger.debug("Covering indexes ready")
+
+    def execute_query(self, query, params=(), raw=False):
         """
         Execute SELECT query and return all results
-        
+
         Args:
             query (str): SQL SELECT query
             params (tuple): Query parameters for safe interpolation
-        
+            raw (bool): Return plain tuples and batch C-level fetches
+                        (for hot paths that index by position)
+
         Returns:
-            list: List of sqlite3.Row objects (dict-like)
+            list: List of sqlite3.Row objects (dict-like), or plain
+                  tuples when raw=True
         """
-        with self.get_connection() as conn:
+        with self.get_connection(readonly=True, raw=raw) as conn:
             cursor = conn.cursor()
+            if raw:
+                cursor.arraysize = 1000
             cursor.execute(query, params)
             return cursor.fetchall()
-    
-    def execute_single(self, query, params=()):
+
+    def execute_single(self, query, params=(), raw=False):
         """
         Execute SELECT query and return single row
-        
+
         Args:
             query (str): SQL SELECT query
             params (tuple): Query parameters
-        
+            raw (bool): Return a plain tuple instead of sqlite3.Row
+
         Returns:
             sqlite3.Row or None: Single row or None if not found
         """
-        with self.get_connection() as conn:
+        with self.get_connection(readonly=True, raw=raw) as conn:
             cursor = conn.cursor()
             cursor.execute(query, params)
             return cursor.fetchone()
     
+    # Fixed COUNT statements per table: identical SQL text on every
+    # call keeps sqlite3's statement cache warm, and table names never
+    # reach string interpolation
+    _COUNT_QUERIES = {
+        'geography': 'SELECT COUNT(*) FROM geography',
+        'occupations': 'SELECT COUNT(*) FROM occupations',
+        'wage_levels': 'SELECT COUNT(*) FROM wage_levels',
+    }
+
     def get_table_count(self, table_name):
         """
         Get record count for a table
-        
+
         Args:
-            table_name (str): Name of table
-        
+            table_name (str): Name of table (must be a known table)
+
         Returns:
             int: Number of records
+
+        Raises:
+            KeyError: If table_name is not one of the schema tables
         """
-        result = self.execute_single(f"SELECT COUNT(*) FROM {table_name}")
+        result = self.execute_single(self._COUNT_QUERIES[table_name])
         return result[0] if result else 0
     
     def get_database_info(self):
         """
         Get database size and record counts
-        
+
+        The three COUNT(*) scans run as one query (one connection
+        checkout instead of three) and the result is cached for
+        INFO_CACHE_TTL seconds - the counts only change when the
+        database is rebuilt, so monitoring calls are effectively free.
+
         Returns:
             dict: Database metadata
         """
-        return {
+        now = time.monotonic()
+        if self._info_cache is not None:
+            cached_at, info = self._info_cache
+            if now - cached_at < INFO_CACHE_TTL:
+                return info
+
+        row = self.execute_single('''
+            SELECT (SELECT COUNT(*) FROM geography),
+                   (SELECT COUNT(*) FROM occupations),
+                   (SELECT COUNT(*) FROM wage_levels)
+        ''')
+        info = {
             'path': self.db_path,
             'size_mb': os.path.getsize(self.db_path) / 1024 / 1024,
-            'geography_records': self.get_table_count('geography'),
-            'occupations_records': self.get_table_count('occupations'),
-            'wage_levels_records': self.get_table_count('wage_levels'),
+            'geography_records': row[0],
+            'occupations_records': row[1],
+            'wage_levels_records': row[2],
         }
+        self._info_cache = (now, info)
+        return info
     
 
 # Global singleton instance
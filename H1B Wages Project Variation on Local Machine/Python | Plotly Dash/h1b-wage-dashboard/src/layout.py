@@ -9,6 +9,11 @@ import dash_bootstrap_components as dbc
 
 from queries import queries
 
+# Dropdown options materialized once at process start; serve_layout
+# runs per page load and only references these
+_STATE_OPTIONS = list(queries.get_state_dropdown_options())
+_OCC_OPTIONS = list(queries.get_occupation_dropdown_options())
+
 
 def serve_layout():
     """
@@ -17,10 +22,6 @@ def serve_layout():
     Uses Phase 1 query layer for initial dropdown options.
     """
 
-    # Initial data for dropdowns
-    all_states = list(queries.get_all_states())
-    occupations = list(queries.get_all_occupations())
-
     return dbc.Container(
         fluid=True,
         children=[
@@ -42,9 +43,7 @@ def serve_layout():
                             html.Label("State"),
                             dcc.Dropdown(
                                 id="state-dropdown",
-                                options=[
-                                    {"label": s, "value": s} for s in all_states
-                                ],
+                                options=_STATE_OPTIONS,
                                 placeholder="Select a state",
                                 value=None,
                                 clearable=True,
@@ -74,13 +73,7 @@ def serve_layout():
                             html.Label("Occupation (SOC)"),
                             dcc.Dropdown(
                                 id="occupation-dropdown",
-                                options=[
-                                    {
-                                        "label": f"{o['job_title']} ({o['soc_code']})",
-                                        "value": o["soc_code"],
-                                    }
-                                    for o in occupations
-                                ],
+                                options=_OCC_OPTIONS,
                                 placeholder="Search or select an occupation",
                                 value=None,
                                 clearable=True,
@@ -204,5 +197,13 @@ def serve_layout():
 
             # Hidden store for client-side state if needed later
             dcc.Store(id="occupation-search-cache"),
+
+            # Dropdown options shipped to the browser once, for
+            # clientside callbacks that need them without a round-trip
+            dcc.Store(
+                id="dropdown-options",
+                data={"states": _STATE_OPTIONS, "occupations": _OCC_OPTIONS},
+                storage_type="memory",
+            ),
         ],
     )
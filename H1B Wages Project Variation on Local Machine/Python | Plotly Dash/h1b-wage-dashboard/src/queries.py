@@ -8,8 +8,25 @@ from functools import lru_cache
 from typing import List, Dict, Optional, Tuple
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# Labels for the integer salary bands the map buckets counties into:
+# BAND_NAMES[band] gives the display string, where band = number of
+# wage levels the salary meets. Five constant strings - never built
+# per row.
+BAND_NAMES = ("Below L1", "Level I", "Level II", "Level III", "Level IV")
+
+
+def _soc_id(soc_code: str) -> int:
+    """
+    Integer JOIN key for a SOC code ('15-1252' -> 151252), matching
+    encode_soc_codes in scripts/setup_database.py. wage_levels stores
+    only integer keys, so hot queries compare fixed-width ints.
+    """
+    return int(soc_code.replace('-', ''))
+
 
 class WageQueries:
     """
@@ -85,6 +102,35 @@ class WageQueries:
         logger.debug(f"Fetched {len(occupations)} occupations")
         return occupations
     
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_state_dropdown_options() -> Tuple[Dict, ...]:
+        """
+        Dropdown-ready state options (cached - built only once)
+
+        Returns:
+            tuple: ({'label': 'Alabama', 'value': 'Alabama'}, ...)
+        """
+        return tuple(
+            {'label': s, 'value': s}
+            for s in WageQueries.get_all_states()
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_occupation_dropdown_options() -> Tuple[Dict, ...]:
+        """
+        Dropdown-ready occupation options (cached - built only once)
+
+        Returns:
+            tuple: ({'label': 'Software Developers (15-1252)',
+                     'value': '15-1252'}, ...)
+        """
+        return tuple(
+            {'label': f"{o['job_title']} ({o['soc_code']})", 'value': o['soc_code']}
+            for o in WageQueries.get_all_occupations()
+        )
+
     @staticmethod
     def get_occupation_by_code(soc_code: str) -> Optional[Dict]:
         """
@@ -129,10 +175,10 @@ class WageQueries:
         row = db.execute_single('''
             SELECT wl.l1_wage, wl.l2_wage, wl.l3_wage, wl.l4_wage
             FROM wage_levels wl
-            JOIN geography g ON wl.area_code = g.area_code
-            WHERE g.state = ? AND g.county = ? AND wl.soc_code = ?
+            JOIN geography g ON wl.area_id = g.area_id
+            WHERE g.state = ? AND g.county = ? AND wl.soc_id = ?
             LIMIT 1
-        ''', (state, county, soc_code))
+        ''', (state, county, _soc_id(soc_code)), raw=True)
         
         if row:
             wages = {
@@ -148,78 +194,229 @@ class WageQueries:
         return None
     
     @staticmethod
-    def get_all_wages_for_occupation(soc_code: str) -> Dict[Tuple[str, str], Dict]:
+    def get_dashboard_bundle(state: str, county: str, soc_code: str) -> Dict:
         """
-        Get ALL county wages for a specific occupation (for map visualization)
-        NOT cached - returns large dataset
-        
+        Get occupation details and L1-L4 wages in ONE round-trip
+
+        The wage-card callback needs both on every filter change;
+        issuing them as a single UNION ALL query with a 'kind'
+        discriminator pays the connection-checkout and cursor cost
+        once instead of twice.
+
         Args:
+            state (str): State name
+            county (str): County name
             soc_code (str): SOC code
-        
+
         Returns:
-            dict: {(state, county): {'L1': ..., 'L2': ..., 'L3': ..., 'L4': ...}, ...}
-            Example:
-            {
-                ('California', 'Alameda County'): {'L1': 89000, 'L2': 107000, ...},
-                ('California', 'Alpine County'): {'L1': 91000, 'L2': 109000, ...},
-                ...
-            }
+            dict: {'occupation': dict or None, 'wages': dict or None}
+            with the same shapes as get_occupation_by_code and
+            get_wage_levels return.
         """
         rows = db.execute_query('''
-            SELECT g.state, g.county, 
-                   wl.l1_wage, wl.l2_wage, wl.l3_wage, wl.l4_wage
+            SELECT 'occ' AS kind, job_title, description, NULL, NULL
+            FROM occupations
+            WHERE soc_code = ?
+            UNION ALL
+            SELECT 'sel', wl.l1_wage, wl.l2_wage, wl.l3_wage, wl.l4_wage
             FROM wage_levels wl
-            JOIN geography g ON wl.area_code = g.area_code
-            WHERE wl.soc_code = ?
-            ORDER BY g.state, g.county 
-        ''', (soc_code,))
-        
-        result = {}
+            JOIN geography g ON wl.area_id = g.area_id
+            WHERE g.state = ? AND g.county = ? AND wl.soc_id = ?
+        ''', (soc_code, state, county, _soc_id(soc_code)))
+
+        bundle = {'occupation': None, 'wages': None}
         for row in rows:
-            state, county = row[0], row[1]
-            result[(state, county)] = {
-                'L1': float(row[2]),
-                'L2': float(row[3]),
-                'L3': float(row[4]),
-                'L4': float(row[5])
+            if row[0] == 'occ':
+                bundle['occupation'] = {
+                    'soc_code': soc_code,
+                    'job_title': row[1],
+                    'description': row[2]
+                }
+            else:
+                bundle['wages'] = {
+                    'L1': float(row[1]),
+                    'L2': float(row[2]),
+                    'L3': float(row[3]),
+                    'L4': float(row[4])
+                }
+
+        if bundle['wages'] is None:
+            logger.warning(f"No wages found for {state}, {county}, {soc_code}")
+        return bundle
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def get_all_wages_for_occupation(soc_code: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Get ALL county wages for a specific occupation (for map visualization)
+        Cached per soc_code - the DB is read-only after setup, so repeat
+        occupation selections skip the ~3000-row JOIN entirely.
+        Callers must treat the returned arrays as read-only.
+
+        Struct-of-arrays layout: one dict per county cost ~100 bytes of
+        object overhead times ~3000 counties per call; parallel arrays
+        are what the map rendering needs anyway.
+
+        Args:
+            soc_code (str): SOC code
+
+        Returns:
+            dict or None: Parallel arrays, None when no rows match:
+            {
+                'state':  ndarray of state names,
+                'county': ndarray of county names,
+                'wages':  float32 ndarray with shape (N, 4) for L1..L4
             }
-        
-        logger.debug(f"Fetched {len(result)} county wages for {soc_code}")
-        return result
+        """
+        # Iterate the cursor instead of fetchall(): rows stream out of
+        # SQLite in arraysize batches and land straight in the output
+        # containers, so the full result list is never materialized.
+        # float32 is plenty for bucketing/colouring wages (~6 decimal
+        # digits) and keeps the cached matrix at a quarter the size of
+        # float64.
+        states = []
+        counties = []
+        wages = np.empty((1024, 4), dtype=np.float32)
+        n = 0
+        with db.get_connection(readonly=True, raw=True) as conn:
+            cursor = conn.cursor()
+            cursor.arraysize = 1024
+            cursor.execute('''
+                SELECT g.state, g.county,
+                       wl.l1_wage, wl.l2_wage, wl.l3_wage, wl.l4_wage
+                FROM wage_levels wl
+                JOIN geography g ON wl.area_id = g.area_id
+                WHERE wl.soc_id = ?
+                ORDER BY g.state, g.county
+            ''', (_soc_id(soc_code),))
+            for row in cursor:
+                if n == len(wages):
+                    wages.resize((2 * n, 4), refcheck=False)
+                states.append(row[0])
+                counties.append(row[1])
+                wages[n] = row[2:6]
+                n += 1
+
+        if n == 0:
+            logger.warning(f"No county wages found for {soc_code}")
+            return None
+
+        wages.resize((n, 4), refcheck=False)  # Trim growth overshoot
+        logger.debug(f"Fetched {n} county wages for {soc_code}")
+        return {
+            'state': np.array(states),
+            'county': np.array(counties),
+            'wages': wages,
+        }
     
     @staticmethod
-    def search_occupations(search_term: str) -> List[Dict]:
+    def search_occupations(search_term: str) -> Tuple[Dict, ...]:
         """
         Search occupations by title or code (autocomplete)
-        NOT cached - depends on search term
-        
+
+        Normalizes case/whitespace before hitting the LRU cache, so
+        the variants typed while autocompleting ('Sof', ' sof ')
+        collapse onto one cached entry.
+
         Args:
             search_term (str): Search text (e.g., 'software' or '15-1252')
-        
+
         Returns:
-            list: Matching occupations (max 20 results)
-            Example: [
+            tuple: Matching occupations (max 20 results)
+        """
+        return WageQueries._search_occupations_cached(search_term.strip().lower())
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _occupation_index() -> Tuple[Tuple[str, str, str], ...]:
+        """
+        Lowercased search keys over the cached occupation list
+
+        One (soc_code, job_title, lowered_key) tuple per occupation,
+        ordered by job_title like get_all_occupations. Built once;
+        ~800 entries make a C-level substring scan faster than any
+        SQL round-trip.
+        """
+        return tuple(
+            (o['soc_code'], o['job_title'],
+             f"{o['soc_code']} {o['job_title']}".lower())
+            for o in WageQueries.get_all_occupations()
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _search_occupations_cached(term: str) -> Tuple[Dict, ...]:
+        """
+        Cached search worker - callers go through search_occupations,
+        which normalizes the term so the cache key space stays small.
+        Autocomplete fires on every keystroke and users retype the
+        same prefixes constantly; ~512 entries covers a session.
+
+        Scans the in-process lowercased index - no SQL at all, 'in'
+        runs str.find in C over ~800 keys.
+
+        Args:
+            term (str): Normalized search text
+
+        Returns:
+            tuple: Matching occupations (max 20 results)
+            Example: (
                 {'soc_code': '15-1252', 'job_title': 'Software Developers'},
                 {'soc_code': '15-1256', 'job_title': 'Software Quality Assurance Analysts'},
                 ...
-            ]
+            )
         """
-        search_param = f"%{search_term}%"
-        rows = db.execute_query('''
-            SELECT soc_code, job_title 
-            FROM occupations 
-            WHERE soc_code LIKE ? OR job_title LIKE ?
-            ORDER BY job_title ASC
-            LIMIT 20
-        ''', (search_param, search_param))
-        
-        results = [
-            {'soc_code': row[0], 'job_title': row[1]} 
-            for row in rows
-        ]
-        logger.debug(f"Found {len(results)} occupations matching '{search_term}'")
-        return results
-    
+        results = []
+        for soc_code, job_title, key in WageQueries._occupation_index():
+            if term in key:
+                results.append({'soc_code': soc_code, 'job_title': job_title})
+                if len(results) == 20:
+                    break
+
+        logger.debug(f"Found {len(results)} occupations matching '{term}'")
+        return tuple(results)
+
+    @staticmethod
+    def warm() -> None:
+        """
+        Populate the single-shot caches at process start
+
+        Runs the queries behind the dropdowns once up front so the
+        first user request never pays cold-cache latency; called at
+        module load below.
+        """
+        WageQueries.get_all_states()
+        WageQueries.get_all_occupations()
+        WageQueries.get_state_dropdown_options()
+        WageQueries.get_occupation_dropdown_options()
+        WageQueries._occupation_index()
+        logger.info("Query caches warmed")
+
+    @staticmethod
+    def clear_search_cache() -> None:
+        """Clear only the autocomplete search cache"""
+        WageQueries._search_occupations_cached.cache_clear()
+        logger.info("Search cache cleared")
+
+    @staticmethod
+    def invalidate() -> None:
+        """
+        Clear every cached accessor
+
+        The caches assume the database is static; call this if the
+        data is ever reloaded in place (e.g. after re-running
+        setup_database.py against a live process).
+        """
+        WageQueries.get_all_states.cache_clear()
+        WageQueries.get_counties_for_state.cache_clear()
+        WageQueries.get_all_occupations.cache_clear()
+        WageQueries.get_state_dropdown_options.cache_clear()
+        WageQueries.get_occupation_dropdown_options.cache_clear()
+        WageQueries.get_all_wages_for_occupation.cache_clear()
+        WageQueries._occupation_index.cache_clear()
+        WageQueries._search_occupations_cached.cache_clear()
+        logger.info("Query caches cleared")
+
     @staticmethod
     def get_database_stats() -> Dict:
         """
@@ -242,3 +439,6 @@ class WageQueries:
 # Singleton instance
 queries = WageQueries()
 
+# Warm the single-shot caches so the first request is served hot
+queries.warm()
+